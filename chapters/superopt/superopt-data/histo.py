@@ -1,6 +1,6 @@
-import csv
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 
 plt.rcParams.update({'font.size': 16})
 plt.rcParams['axes.spines.right'] = False
@@ -8,67 +8,50 @@ plt.rcParams['axes.spines.top'] = False
 
 
 
-with open('block_gas_usages_tosem_b.csv', 'r') as file:
-    csv_reader = csv.DictReader(file)
-    data = [row for row in csv_reader]
+gas_columns = ['our_tool_gas_cost', 'syrup_tool_gas_cost', 'original_gas_cost']
+df = pd.read_csv('block_gas_usages_tosem_b.csv', usecols=gas_columns, dtype={c: np.int64 for c in gas_columns})
 
 
-our_gas = [int(d['our_tool_gas_cost']) for d in data]
-syrup_gas = [int(d['syrup_tool_gas_cost']) for d in data]
-original_gas = [int(d['original_gas_cost']) for d in data]
+our_gas = df['our_tool_gas_cost'].to_numpy()
+syrup_gas = df['syrup_tool_gas_cost'].to_numpy()
+original_gas = df['original_gas_cost'].to_numpy()
+
+hist_bins = np.arange(0, 101, 5)
+
+def plot_histogram(values):
+	#bin in numpy, then draw all bars with a single plt.bar call
+	counts, edges = np.histogram(values, bins=hist_bins)
+	bars = plt.bar((edges[:-1]+edges[1:])/2, counts, width=np.diff(edges))
+	plt.bar_label(bars)
+	plt.xticks(hist_bins)
+	plt.show()
+	plt.clf()
+
+
+#improvement of ours over baseline, syrup over baseline and ours over syrup, in one pass
+improvements = (1.0 - np.vstack((our_gas, syrup_gas, our_gas))/np.vstack((original_gas, original_gas, syrup_gas)))*100.0
+better = improvements>0
+imp_ours_orig, imp_syrup_orig, imp_ours_syrup = (row[mask] for row, mask in zip(improvements, better))
 
 
 #our improvement over baseline
-temp = [(1-i/j)*100 for i, j in zip(our_gas, original_gas)]
-imp1 = []
-total_improvement = 0
-for x in temp:
-	if x>0:
-		imp1.append(x)
-		total_improvement+=x
-
-print("Number of blocks for which we are better than unoptimized = "+str(len(imp1)))
-print("Average improvement = "+str(total_improvement/len(imp1)))
-
-values, bins, bars = plt.hist(imp1, bins=range(0, 101,5))
-plt.bar_label(bars)
-plt.xticks(range(0, 101, 5))
-plt.show()
-plt.clf()
+print("Number of blocks for which we are better than unoptimized = "+str(imp_ours_orig.size))
+print("Average improvement = "+str(imp_ours_orig.mean()))
+
+plot_histogram(imp_ours_orig)
 
 #syrup's improvement over baseline
-temp_syrup = [(1-i/j)*100 for i, j in zip(syrup_gas, original_gas)]
-imp1_syrup = []
-total_improvement_syrup = 0
-for x in temp_syrup:
-	if x>0:
-		imp1_syrup.append(x)
-		total_improvement_syrup+=x
-	
-print("Number of blocks for which syrup is better than unoptimized = "+str(len(imp1_syrup)))
-print("Average improvement = "+str(total_improvement_syrup/len(imp1_syrup)))
+print("Number of blocks for which syrup is better than unoptimized = "+str(imp_syrup_orig.size))
+print("Average improvement = "+str(imp_syrup_orig.mean()))
 
 
 #our improvement over syrup
-temp = [(1-i/j)*100 for i, j in zip(our_gas, syrup_gas)]
-imp1 = []
-total_improvement = 0
-for x in temp:
-	if x>0:
-		imp1.append(x)
-		total_improvement+=x
-
-print("Number of blocks for which we are better than syrup = "+str(len(imp1)))
-print("Average improvement = "+str(total_improvement/len(imp1)))
-
-values, bins, bars = plt.hist(imp1, bins=range(0, 101,5))
-plt.bar_label(bars)
-plt.xticks(range(0, 101, 5))
-plt.show()
-plt.clf()
+print("Number of blocks for which we are better than syrup = "+str(imp_ours_syrup.size))
+print("Average improvement = "+str(imp_ours_syrup.mean()))
+
+plot_histogram(imp_ours_syrup)
 
 #scatter plot
-our_syrup = list(zip(our_gas, syrup_gas))
-our_syrup.sort()
-plt.scatter([i for (i, j) in our_syrup], [j for (i, j) in our_syrup])
+our_syrup = np.lexsort((syrup_gas, our_gas))
+plt.scatter(our_gas[our_syrup], syrup_gas[our_syrup])
 #plt.show()
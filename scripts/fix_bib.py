@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 import re
 import os
+import mmap
 import sys
+import string
 import unicodedata
 import argparse
 from collections import defaultdict
+from functools import lru_cache
 from urllib.parse import urlparse
 
 BIB_PATH = 'refs.bib'
@@ -12,24 +15,47 @@ BACKUP_PATH = BIB_PATH + '.bak'
 BASE_DIR = '.'
 
 entry_re = re.compile(r'@(?P<type>\w+)\s*\{\s*(?P<key>[^,]+),')
-field_re = re.compile(r'(?P<name>\w+)\s*=\s*(?P<value>\{(?:[^{}]|\{[^}]*\})*\}|\"[^\"]*\"|[^,\n]+)', re.IGNORECASE)
-
-COMMON_STOPWORDS = {'the','and','of','for','on','in','a','an','to','with','by','via','using'}
-
-
+field_re = re.compile(r'(?P<name>\w+)\s*=\s*(?:\{(?P<braced>(?:[^{}]|\{[^}]*\})*)\}|\"(?P<quoted>[^\"]*)\"|(?P<plain>[^,\n]+))', re.IGNORECASE)
+
+# Pattern to match LaTeX citation commands
+cite_pattern = re.compile(
+    r'(\\(?:cite|citet|citep|citealt|citealp|citeauthor|citeyear|citeyearpar|Cite|Citet|Citep)'
+    r'(?:\*)?(?:\[[^\]]*\])*)\{([^}]+)\}'
+)
+
+# Patterns used by the key-generation helpers
+author_sep_re = re.compile(r'\s+and\s+')
+latex_cmd_re = re.compile(r'\\[A-Za-z]+\*?(?:\[[^\]]*\])?(?:\{[^}]*\})?')
+title_strip_re = re.compile(r'[{}"]')
+lower_word_re = re.compile(r"[a-z0-9]+")
+word_re = re.compile(r"[A-Za-z0-9]+")
+url_cmd_re = re.compile(r'\\url\{([^}]*)\}')
+# asciiify output is pure ASCII, so deleting every other ASCII char keeps [a-z0-9]
+non_alnum_lower_table = str.maketrans('', '', ''.join(
+    chr(c) for c in range(128) if chr(c) not in string.ascii_lowercase + string.digits))
+non_alnum_re = re.compile(r'[^a-zA-Z0-9]')
+
+COMMON_STOPWORDS = frozenset({'the','and','of','for','on','in','a','an','to','with','by','via','using'})
+
+
+@lru_cache(maxsize=8192)
 def asciiify(s):
     if not s:
         return ''
+    # ASCII text is already NFKD-normalized, skip the Unicode round trip
+    if s.isascii():
+        return s
     s = unicodedata.normalize('NFKD', s)
     s = s.encode('ascii', 'ignore').decode('ascii')
     return s
 
 
+@lru_cache(maxsize=None)
 def first_author_lastname(author_field):
     if not author_field:
         return 'unknown'
     # split multiple authors by ' and ' (BibTeX standard)
-    authors = [a.strip() for a in re.split(r'\s+and\s+', author_field)]
+    authors = [a.strip() for a in author_sep_re.split(author_field)]
     first = authors[0]
     # If format 'Last, First'
     if ',' in first:
@@ -37,30 +63,38 @@ def first_author_lastname(author_field):
     else:
         parts = first.split()
         last = parts[-1] if parts else 'unknown'
-    last = asciiify(last).lower()
-    last = re.sub(r'[^a-z0-9]', '', last)
+    last = asciiify(last).lower().translate(non_alnum_lower_table)
     return last or 'unknown'
 
 
-def extract_field(entry_text, name):
-    m = re.search(r'%s\s*=\s*(\{((?:[^{}]|\{[^}]*\})*)\}|\"([^\"]*)\"|([^,\n]+))' % re.escape(name), entry_text, re.IGNORECASE)
-    if not m:
-        return None
-    # group 2 is inside braces, group 3 is inside quotes, group 4 is plain
-    val = m.group(2) or m.group(3) or m.group(4)
-    if val is None:
-        return None
-    return val.strip()
+def entry_fields(entry_text):
+    """Collect all fields of an entry in a single scan, keyed by lowercase name.
 
+    Outer braces or quotes are dropped; a plain value is kept as written:
 
+    >>> entry_fields('title = {Unclosed, year = 2020')
+    {'title': '{Unclosed', 'year': '2020'}
+    """
+    fields = {}
+    for m in field_re.finditer(entry_text):
+        val = m.group('braced')
+        if val is None:
+            val = m.group('quoted')
+        if val is None:
+            val = m.group('plain')
+        fields.setdefault(m.group('name').lower(), val.strip())
+    return fields
+
+
+@lru_cache(maxsize=None)
 def short_title_word(title_field):
     if not title_field:
         return 'misc'
     # remove braces and LaTeX commands
-    t = re.sub(r'\\[A-Za-z]+\*?(?:\[[^\]]*\])?(?:\{[^}]*\})?', '', title_field)
-    t = re.sub(r'[{}"]', '', t)
+    t = latex_cmd_re.sub('', title_field)
+    t = title_strip_re.sub('', t)
     t = asciiify(t).lower()
-    words = re.findall(r"[a-z0-9]+", t)
+    words = lower_word_re.findall(t)
     for w in words:
         if w not in COMMON_STOPWORDS:
             return w
@@ -72,12 +106,13 @@ def make_key(last, year, word):
     return f"{last}{y}{word}"
 
 
+@lru_cache(maxsize=None)
 def extract_domain_from_url(url):
     """Extract domain name from URL and convert to camelCase format."""
     if not url:
         return None
     # Remove LaTeX \url{} command if present
-    url = re.sub(r'\\url\{([^}]*)\}', r'\1', url)
+    url = url_cmd_re.sub(r'\1', url)
     url = url.strip()
     
     # Add scheme if missing for urlparse to work correctly
@@ -104,28 +139,23 @@ def extract_domain_from_url(url):
     return domain.capitalize()
 
 
+@lru_cache(maxsize=None)
 def title_to_camel_case_words(title_field, min_words=3):
     """Convert title to camelCase using at least min_words words."""
     if not title_field:
         return ''
     # Remove braces and LaTeX commands
-    t = re.sub(r'\\[A-Za-z]+\*?(?:\[[^\]]*\])?(?:\{[^}]*\})?', '', title_field)
-    t = re.sub(r'[{}"]', '', t)
+    t = latex_cmd_re.sub('', title_field)
+    t = title_strip_re.sub('', t)
     t = asciiify(t)
     # Extract words
-    words = re.findall(r"[A-Za-z0-9]+", t)
-    # Take at least min_words, skip common stopwords if possible
-    selected = []
-    for w in words:
-        if len(selected) >= min_words:
-            break
-        # For the camelCase format, include all significant words
-        if w.lower() not in COMMON_STOPWORDS or len(selected) == 0:
-            selected.append(w.capitalize())
+    words = word_re.findall(t)
+    # The first word always counts, later ones only if they are not stopwords
+    selected = words[:1] + [w for w in words[1:] if w.lower() not in COMMON_STOPWORDS]
     # If we don't have enough, just take the first min_words
     if len(selected) < min_words:
-        selected = [w.capitalize() for w in words[:min_words]]
-    return ''.join(selected)
+        selected = words
+    return ''.join(w.capitalize() for w in selected[:min_words])
 
 
 def make_key_from_url(url, title):
@@ -139,7 +169,7 @@ def make_key_from_url(url, title):
     # Ensure the key only contains alphanumeric characters
     key = f"{domain}{title_part}"
     # Remove any remaining invalid characters (backslashes, colons, etc.)
-    key = re.sub(r'[^a-zA-Z0-9]', '', key)
+    key = non_alnum_re.sub('', key)
     return key
 
 
@@ -158,49 +188,92 @@ def write_file(path, data):
         f.write(data)
 
 
-def parse_entries(bibtext):
-    entries = []
-    # find all entry starts
-    matches = list(entry_re.finditer(bibtext))
-    for i, m in enumerate(matches):
-        start = m.start()
-        end = matches[i+1].start() if i+1 < len(matches) else len(bibtext)
-        entry_text = bibtext[start:end].rstrip('\n')
-        etype = m.group('type')
-        key = m.group('key').strip()
-        entries.append((key, etype, entry_text))
-    return entries
+def write_entries(path, entries):
+    # Same layout as '\n\n'.join(entries) + '\n', without building the joined string
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, e in enumerate(entries):
+            if i:
+                f.write('\n\n')
+            f.write(e)
+        f.write('\n')
+
+
+def may_cite_any(path, key_bytes):
+    """Cheap pre-filter: can the file at path contain a cite_pattern match naming any of key_bytes?"""
+    # search the mapped file in place; files without a hit are never decoded
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            return False
+        with mm:
+            # Every command matched by cite_pattern starts with \cite or \Cite
+            if mm.find(b'\\cite') == -1 and mm.find(b'\\Cite') == -1:
+                return False
+            return any(mm.find(k) != -1 for k in key_bytes)
+
+
+def iter_tex(root):
+    """Yield the paths of all .tex files under root, skipping .git."""
+    # scandir entries carry the file type from the directory listing, so no
+    # extra stat() per file is needed (unlike os.walk + os.path.join)
+    try:
+        it = os.scandir(root)
+    except OSError:
+        # unreadable directory: skip it, as os.walk does by default
+        return
+    with it:
+        for e in it:
+            try:
+                is_dir = e.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False  # os.walk treats these as non-directories too
+            if is_dir:
+                if e.name != '.git':
+                    yield from iter_tex(e.path)
+            elif e.name.endswith('.tex'):
+                yield e.path
 
 
 def parse_entries(bibtext):
-    entries = []
-    # find all entry starts
-    matches = list(entry_re.finditer(bibtext))
-    for i, m in enumerate(matches):
-        start = m.start()
-        end = matches[i+1].start() if i+1 < len(matches) else len(bibtext)
-        entry_text = bibtext[start:end].rstrip('\n')
-        etype = m.group('type')
-        key = m.group('key').strip()
-        entries.append((key, etype, entry_text))
-    return entries
+    """Yield (key, type, start, end, header_end) spans of the entries in bibtext.
+
+    Entries are not sliced out here; use slice_entry(bibtext, start, end) when
+    the body is actually needed. header_end is the offset just past the
+    '@type{key,' header.
+    """
+    # walk entry starts pairwise; each entry ends where the next one starts
+    it = entry_re.finditer(bibtext)
+    m = next(it, None)
+    while m is not None:
+        nxt = next(it, None)
+        end = nxt.start() if nxt is not None else len(bibtext)
+        yield m.group('key').strip(), m.group('type'), m.start(), end, m.end()
+        m = nxt
+
+
+def slice_entry(bibtext, start, end):
+    return bibtext[start:end].rstrip('\n')
 
 
 def find_duplicates(bibtext):
     """Find duplicate bib entries by normalizing key content."""
-    entries = parse_entries(bibtext)
+    entries = list(parse_entries(bibtext))
     # Map from normalized signature -> list of keys
     signature_map = defaultdict(list)
     
-    for key, etype, entry_text in entries:
-        author = extract_field(entry_text, 'author') or extract_field(entry_text, 'editor')
-        year = extract_field(entry_text, 'year')
-        title = extract_field(entry_text, 'title')
+    for key, etype, start, end, header_end in entries:
+        fields = entry_fields(slice_entry(bibtext, start, end))
+        author = fields.get('author') or fields.get('editor')
+        year = fields.get('year')
+        title = fields.get('title')
         
-        # Create a normalized signature
-        author_norm = asciiify(author or '').lower() if author else ''
-        title_norm = asciiify(title or '').lower() if title else ''
-        year_norm = year or ''
+        # Create a normalized signature; interned so repeated authors/years share
+        # one string object and signature lookups hit the identity fast path
+        author_norm = sys.intern(asciiify(author or '').lower()) if author else ''
+        title_norm = sys.intern(asciiify(title or '').lower()) if title else ''
+        year_norm = sys.intern(year) if year else ''
         
         signature = (author_norm, year_norm, title_norm)
         signature_map[signature].append(key)
@@ -243,10 +316,11 @@ def spot_duplicates():
     # Check key naming
     wrong_names = {}
     pattern_ok_cache = {}
-    for key, etype, entry_text in entries:
-        author = extract_field(entry_text, 'author') or extract_field(entry_text, 'editor')
-        year = extract_field(entry_text, 'year') or ''
-        title = extract_field(entry_text, 'title') or ''
+    for key, etype, start, end, header_end in entries:
+        fields = entry_fields(slice_entry(bibtext, start, end))
+        author = fields.get('author') or fields.get('editor')
+        year = fields.get('year') or ''
+        title = fields.get('title') or ''
         last = first_author_lastname(author)
         word = short_title_word(title)
         base = make_key(last, year, word)
@@ -266,6 +340,22 @@ def spot_duplicates():
         print("All keys conform to the desired naming base pattern.")
 
 
+def make_citation_replacer(mapping):
+    """Build a cite_pattern substitution callback that renames keys via mapping."""
+    def replace_keys_in_citation(match):
+        """Replace citation keys within a single citation command."""
+        prefix = match.group(1)  # The \cite command part
+        keys_str = match.group(2)  # The comma-separated keys
+        keys = [k.strip() for k in keys_str.split(',')]
+        # Replace each key if it's in the mapping
+        new_keys = [mapping.get(k, k) for k in keys]
+        if new_keys == keys:
+            # Nothing to rename, keep the citation exactly as written
+            return match.group(0)
+        return f"{prefix}{{{', '.join(new_keys)}}}"
+    return replace_keys_in_citation
+
+
 def fix_all():
     """Comprehensive fix: remove duplicates and rename all keys to standard format."""
     if not os.path.exists(BIB_PATH):
@@ -285,7 +375,7 @@ def fix_all():
         print(f"\nFound {len(duplicates)} groups of duplicate entries")
         # Build a map from key to list of indices where it appears
         key_to_indices = defaultdict(list)
-        for idx, (key, etype, entry_text) in enumerate(entries):
+        for idx, (key, etype, start, end, header_end) in enumerate(entries):
             key_to_indices[key].append(idx)
         
         for sig, keys in duplicates.items():
@@ -306,20 +396,22 @@ def fix_all():
         print("\nNo duplicates found")
     
     # Filter out duplicates by index
-    unique_entries = [(key, etype, entry_text) for idx, (key, etype, entry_text) in enumerate(entries) 
-                      if idx not in indices_to_remove]
+    unique_entries = [entry for idx, entry in enumerate(entries) if idx not in indices_to_remove]
     
     # Step 2: Rename all keys to standard format
     print(f"\nRenaming {len(unique_entries)} entries to standard format...")
     mapping = {}
-    counts = defaultdict(int)
+    used = set()
+    # next numeric suffix to try for each base (base, base2, base3, ...)
+    next_idx = {}
     new_entries = []
     
-    for old_key, etype, entry_text in unique_entries:
-        author = extract_field(entry_text, 'author') or extract_field(entry_text, 'editor')
-        year = extract_field(entry_text, 'year')
-        title = extract_field(entry_text, 'title')
-        url = extract_field(entry_text, 'url') or extract_field(entry_text, 'howpublished')
+    for old_key, etype, start, end, header_end in unique_entries:
+        fields = entry_fields(slice_entry(bibtext, start, end))
+        author = fields.get('author') or fields.get('editor')
+        year = fields.get('year')
+        title = fields.get('title')
+        url = fields.get('url') or fields.get('howpublished')
         
         # For web sources without author, use domain + title format
         if not author and url:
@@ -332,17 +424,17 @@ def fix_all():
         candidate = base
         
         # Ensure uniqueness
-        while candidate in counts:
-            counts[base] += 1
-            candidate = f"{base}{counts[base]}"
-        counts[candidate] += 1
+        if candidate in used:
+            i = next_idx.get(base, 2)
+            while f"{base}{i}" in used:
+                i += 1
+            candidate = f"{base}{i}"
+            next_idx[base] = i + 1
+        used.add(candidate)
         mapping[old_key] = candidate
         
-        # Replace the key in the entry header
-        # Escape backslashes in candidate to avoid re.sub interpretation issues
-        escaped_candidate = candidate.replace('\\', '\\\\')
-        new_entry = re.sub(r'@' + re.escape(etype) + r'\s*\{\s*' + re.escape(old_key) + r'\s*,',
-                           f'@{etype}{{{escaped_candidate},', entry_text, count=1)
+        # Replace the key in the entry header, which always starts the entry
+        new_entry = f'@{etype}{{{candidate},' + slice_entry(bibtext, header_end, end)
         new_entries.append(new_entry)
     
     # Merge duplicate mappings with rename mappings
@@ -351,38 +443,29 @@ def fix_all():
         if canonical in mapping:
             mapping[dup_key] = mapping[canonical]
     
+    # Collect the .tex files before touching refs.bib, so a failing directory
+    # scan cannot leave a renamed bib with stale citations behind
+    tex_files = list(iter_tex(BASE_DIR))
+    
     # Write new bib file
-    new_bib = '\n\n'.join(new_entries) + '\n'
-    write_file(BIB_PATH, new_bib)
+    write_entries(BIB_PATH, new_entries)
     
     # Step 3: Update all .tex files
-    tex_files = []
-    for root, dirs, files in os.walk(BASE_DIR):
-        if '.git' in root.split(os.sep):
-            continue
-        for fn in files:
-            if fn.endswith('.tex'):
-                tex_files.append(os.path.join(root, fn))
-    
     print(f"\nUpdating {len(tex_files)} .tex files...")
     replaced_count = 0
     
-    # Pattern to match LaTeX citation commands
-    cite_pattern = re.compile(
-        r'(\\(?:cite|citet|citep|citealt|citealp|citeauthor|citeyear|citeyearpar|Cite|Citet|Citep)'
-        r'(?:\*)?(?:\[[^\]]*\])*)\{([^}]+)\}'
-    )
+    # Only keys that were actually renamed can change a .tex file
+    changed_keys = {k: v for k, v in mapping.items() if k != v}
+    replace_keys_in_citation = make_citation_replacer(changed_keys)
     
-    def replace_keys_in_citation(match):
-        """Replace citation keys within a single citation command."""
-        prefix = match.group(1)  # The \cite command part
-        keys_str = match.group(2)  # The comma-separated keys
-        keys = [k.strip() for k in keys_str.split(',')]
-        # Replace each key if it's in the mapping
-        new_keys = [mapping.get(k, k) for k in keys]
-        return f"{prefix}{{{', '.join(new_keys)}}}"
+    # Renamed keys as bytes, in both encodings read_file accepts
+    changed_key_bytes = {k.encode('utf-8') for k in changed_keys}
+    changed_key_bytes.update(k.encode('latin-1') for k in changed_keys
+                             if all(ord(c) < 256 for c in k))
     
-    for tf in tex_files:
+    for tf in tex_files if changed_keys else ():
+        if not may_cite_any(tf, changed_key_bytes):
+            continue
         txt = read_file(tf)
         original = txt
         # Replace keys only within citation commands
@@ -398,12 +481,10 @@ def fix_all():
     print(f"Removed {len(indices_to_remove)} duplicate entries")
     print(f"Renamed {len(unique_entries)} entries to standard format")
     print(f"Updated {replaced_count} .tex files")
-    if mapping:
-        changed_keys = {k: v for k, v in mapping.items() if k != v}
-        if changed_keys:
-            print(f"\nKey mappings ({len(changed_keys)} changed):")
-            for old, new in sorted(changed_keys.items()):
-                print(f"  {old} -> {new}")
+    if changed_keys:
+        print(f"\nKey mappings ({len(changed_keys)} changed):")
+        for old, new in sorted(changed_keys.items()):
+            print(f"  {old} -> {new}")
 
 
 def main():
@@ -16,17 +16,24 @@ Safety Features:
 
 import re
 import os
+import mmap
 import sys
+import shutil
+import string
 import unicodedata
 import argparse
-from collections import defaultdict
-from urllib.parse import urlparse
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 
 # Default configuration paths
 BIB_PATH = 'refs.bib'
 BACKUP_PATH = BIB_PATH + '.bak'
 BASE_DIR = '.'
 
+# Directories never searched for .tex files (VCS, virtualenvs, build output)
+SKIP_DIRS = {'.git', '.venv', 'node_modules', '_build', 'build'}
+
 # ============================================================================
 # REGEX PATTERNS - CORRECTED
 # ============================================================================
@@ -46,14 +53,69 @@ field_re = re.compile(
     re.IGNORECASE
 )
 
+# Pattern to find every field needed for duplicate detection and key
+# generation in a single scan (see extract_all_fields). Only the
+# "name =" part is matched; the value is read by read_field_value
+all_fields_re = re.compile(
+    r'\b(?P<name>author|editor|year|title|doi|isbn|url|howpublished)\s*=\s*',
+    re.IGNORECASE
+)
+
+# Field value forms handled by read_field_value (braced values are scanned
+# by hand so unbalanced braces cannot cause regex backtracking)
+brace_re = re.compile(r'[{}]')
+quoted_value_re = re.compile(r'"([^"]*)"')
+plain_value_re = re.compile(r'[^,\n]+')
+
+# Patterns used by the key-generation helpers
+author_sep_re = re.compile(r'\s+and\s+', re.IGNORECASE)
+latex_cmd_re = re.compile(r'\\[A-Za-z]+\*?(?:\[[^\]]*\])?(?:\{[^}]*\})?')
+# Deletion table for braces, quotes and backslashes (str.translate avoids the
+# regex engine for a fixed set of characters)
+brace_quote_table = str.maketrans('', '', '{}"\\')
+lower_word_re = re.compile(r'[a-z0-9]+')
+url_cmd_re = re.compile(r'\\url\{([^}]*)\}')
+# Host part of a URL with optional scheme and www. prefix (extract_domain_from_url)
+domain_re = re.compile(r'(?:https?://)?(?:www\.)?([^/?#\s]*)', re.IGNORECASE)
+# asciiify output is pure ASCII, so deleting every other ASCII char keeps [a-z0-9]
+non_alnum_lower_table = str.maketrans('', '', ''.join(
+    chr(c) for c in range(128) if chr(c) not in string.ascii_lowercase + string.digits))
+non_alnum_re = re.compile(r'[^a-zA-Z0-9]')
+# LaTeX accent macros such as \'{o}, \"u, \c{c} or \v{s}, reduced to their
+# base letter (a dotless \i or \j base is unwrapped as well)
+latex_accent_re = re.compile(
+    r'\\(?:[`\'^"~=.]|[cvuHdbrtk](?![A-Za-z]))\s*\{?\s*\\?([A-Za-z])\s*\}?')
+# Letter macros such as \ss or \o and their ASCII spelling
+latex_letters = {'ss': 'ss', 'ae': 'ae', 'AE': 'AE', 'oe': 'oe', 'OE': 'OE',
+                 'aa': 'a', 'AA': 'A', 'o': 'o', 'O': 'O', 'l': 'l', 'L': 'L',
+                 'i': 'i', 'j': 'j'}
+latex_letter_re = re.compile(r'\\(' + '|'.join(sorted(latex_letters, key=len, reverse=True)) + r')(?![A-Za-z])')
+
+# Pattern to match citation commands with their arguments
+# Matches: \cite{key} or \cite[p. 5]{key} or \citep[see]{key} etc.
+# FIXED: Now handles optional arguments correctly
+# The optional-argument run is an atomic group where supported (Python 3.11+):
+# giving back a [...] can never lead to a match, so backtracking into it is
+# pure overhead
+cite_opt_args = r'(?>(?:\s*\[[^\]]*\])*)' if sys.version_info >= (3, 11) else r'(?:\s*\[[^\]]*\])*'
+cite_pattern = re.compile(
+    r'(\\(?:cite|citet|citep|citealt|citealp|citeauthor|citeyear|citeyearpar|'
+    r'Cite|Citet|Citep|Citealt|Citealp|Citeauthor|Citeyear|Citeyearpar|'
+    r'nocite|nocite\*)'
+    r'(?:\*)?'  # Optional * for starred variants
+    + cite_opt_args +  # Optional arguments: [p. 5], [see][chap. 2], etc.
+    r')\s*\{([^}]+)\}'  # Required argument with keys
+)
+
 # Common English stopwords for generating short key names
-COMMON_STOPWORDS = {'the', 'and', 'of', 'for', 'on', 'in', 'a', 'an', 'to', 
-                    'with', 'by', 'via', 'using', 'from', 'at', 'or', 'is'}
+COMMON_STOPWORDS = frozenset({'the', 'and', 'of', 'for', 'on', 'in', 'a', 'an', 'to',
+                              'with', 'by', 'via', 'using', 'from', 'at', 'or', 'is'})
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
+@lru_cache(maxsize=8192)
 def asciiify(s):
     """
     Convert string to ASCII-only, removing accents and special characters.
@@ -76,6 +138,20 @@ def asciiify(s):
     return s
 
 
+def normalize_field(value):
+    """
+    Normalize a field value for duplicate comparison.
+    
+    Args:
+        value: Field value (or None)
+        
+    Returns:
+        Lowercase ASCII string, or '' if the field is missing
+    """
+    return asciiify(value).lower() if value else ''
+
+
+@lru_cache(maxsize=4096)
 def first_author_lastname(author_field):
     """
     Extract the last name of the first author from a BibTeX author field.
@@ -96,7 +172,7 @@ def first_author_lastname(author_field):
         return 'unknown'
     
     # Split multiple authors by 'and' (BibTeX standard)
-    authors = [a.strip() for a in re.split(r'\s+and\s+', author_field, flags=re.IGNORECASE)]
+    authors = [a.strip() for a in author_sep_re.split(author_field)]
     first = authors[0]
     
     # Two BibTeX author name formats:
@@ -110,51 +186,98 @@ def first_author_lastname(author_field):
         parts = first.split()
         last = parts[-1] if parts else 'unknown'
     
+    # Resolve LaTeX accents to their base letters so that Ne{\v{s}}et{\v{r}}il
+    # gives "nesetril" rather than keeping the macro names
+    if '\\' in last:
+        last = latex_accent_re.sub(r'\1', last)
+        last = latex_letter_re.sub(lambda m: latex_letters[m.group(1)], last)
+    
     # Normalize and extract alphanumeric only
-    last = asciiify(last).lower()
-    last = re.sub(r'[^a-z0-9]', '', last)
+    last = asciiify(last).lower().translate(non_alnum_lower_table)
     
     return last or 'unknown'
 
 
-def extract_field(entry_text, name):
+def extract_braced_value(text, start):
     """
-    Extract a field value from a BibTeX entry.
+    Read a brace-delimited value by counting brace depth.
     
-    Handles three formats:
-    - Braced: field = {value with {nested braces}}
-    - Quoted: field = "quoted value"
-    - Plain: field = plainvalue (until comma or newline)
+    Runs in linear time, unlike a nested-quantifier regex, and handles
+    arbitrarily nested braces.
     
     Args:
-        entry_text: Full BibTeX entry text
-        name: Field name to extract (e.g., "author", "title", "year")
+        text: Text containing the value
+        start: Index of the opening '{'
         
     Returns:
-        Field value (with outer braces/quotes removed) or None if not found
-    """
-    # Regex to find: fieldname = {value} or "value" or plain
-    # Group 2: content inside braces
-    # Group 3: content inside quotes
-    # Group 4: plain unquoted value
-    m = re.search(
-        r'%s\s*=\s*(\{((?:[^{}]|\{[^}]*\})*)\}|"([^"]*)"|([^,\n]+))' % re.escape(name),
-        entry_text,
-        re.IGNORECASE
-    )
+        Tuple: (content inside the outer braces, index after the closing '}'),
+        or (None, start) if the braces are unbalanced
+    """
+    depth = 0
+    for m in brace_re.finditer(text, start):
+        if m.group() == '{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:m.start()], m.end()
+    return None, start
+
+
+def read_field_value(text, pos):
+    """
+    Read a BibTeX field value starting at pos (just after "name =").
     
-    if not m:
-        return None
+    Args:
+        text: Full BibTeX entry text
+        pos: Index where the value starts
+        
+    Returns:
+        Tuple: (raw value with outer braces/quotes removed, end index),
+        or (None, pos) if no value form matches
+    """
+    if text.startswith('{', pos):
+        val, end = extract_braced_value(text, pos)
+        if val is not None:
+            return val, end
     
-    # Get whichever group matched (braces, quotes, or plain)
-    val = m.group(2) or m.group(3) or m.group(4)
+    m = quoted_value_re.match(text, pos) or plain_value_re.match(text, pos)
+    if m:
+        return m.group(m.lastindex or 0), m.end()
     
-    if val is None:
-        return None
+    return None, pos
+
+
+def extract_all_fields(entry_text):
+    """
+    Extract all fields used by this tool from a BibTeX entry in one pass.
+    
+    Covers author, editor, year, title, doi, isbn, url and howpublished.
+    Braced and quoted values have their outer delimiters removed, and empty
+    values are returned as None.
+    
+    Args:
+        entry_text: Full BibTeX entry text
+        
+    Returns:
+        Dict mapping lowercase field name to value (first occurrence wins)
+    """
+    fields = {}
+    pos = 0
     
-    return val.strip()
+    while True:
+        m = all_fields_re.search(entry_text, pos)
+        if not m:
+            break
+        
+        val, pos = read_field_value(entry_text, m.end())
+        if val is not None:
+            fields.setdefault(m.group('name').lower(), val.strip() if val else None)
+    
+    return fields
 
 
+@lru_cache(maxsize=4096)
 def short_title_word(title_field):
     """
     Extract first meaningful (non-stopword) word from title for key generation.
@@ -173,16 +296,16 @@ def short_title_word(title_field):
         return 'misc'
     
     # Remove LaTeX commands like \emph{}, \textbf{}, \cite{}, etc.
-    t = re.sub(r'\\[A-Za-z]+\*?(?:\[[^\]]*\])?(?:\{[^}]*\})?', '', title_field)
+    t = latex_cmd_re.sub('', title_field)
     
     # Remove braces and quotes
-    t = re.sub(r'[{}"\\]', '', t)
+    t = t.translate(brace_quote_table)
     
     # Normalize to ASCII and lowercase
     t = asciiify(t).lower()
     
     # Extract words (alphanumeric sequences)
-    words = re.findall(r'[a-z0-9]+', t)
+    words = lower_word_re.findall(t)
     
     # Return first non-stopword, or first word if all are stopwords
     for w in words:
@@ -230,27 +353,15 @@ def extract_domain_from_url(url):
         return None
     
     # Remove LaTeX \url{} command if present
-    url = re.sub(r'\\url\{([^}]*)\}', r'\1', url)
+    url = url_cmd_re.sub(r'\1', url)
     url = url.strip()
     
-    # Add https:// if no scheme specified (required for urlparse)
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    
-    # Parse URL to extract domain
-    try:
-        parsed = urlparse(url)
-        domain = parsed.netloc
-    except Exception:
-        return None
+    # Take the host directly; a full urlparse is not needed for the netloc
+    domain = domain_re.match(url).group(1)
     
     if not domain:
         return None
     
-    # Remove www. prefix
-    if domain.startswith('www.'):
-        domain = domain[4:]
-    
     # Convert to CamelCase: "example.com" -> "ExampleCom"
     parts = domain.split('.')
     if len(parts) > 1:
@@ -260,6 +371,7 @@ def extract_domain_from_url(url):
     return domain.capitalize()
 
 
+@lru_cache(maxsize=4096)
 def title_to_camel_case_words(title_field, min_words=3):
     """
     Convert title to CamelCase using at least min_words significant words.
@@ -279,16 +391,17 @@ def title_to_camel_case_words(title_field, min_words=3):
         return ''
     
     # Remove LaTeX commands
-    t = re.sub(r'\\[A-Za-z]+\*?(?:\[[^\]]*\])?(?:\{[^}]*\})?', '', title_field)
+    t = latex_cmd_re.sub('', title_field)
     
     # Remove braces and quotes
-    t = re.sub(r'[{}"\\]', '', t)
+    t = t.translate(brace_quote_table)
     
-    # Normalize to ASCII
-    t = asciiify(t)
+    # Normalize to ASCII and lowercase once, so stopword checks need no
+    # per-word lower() (capitalize() below restores the CamelCase)
+    t = asciiify(t).lower()
     
     # Extract words (sequences of alphanumeric)
-    words = re.findall(r'[A-Za-z0-9]+', t)
+    words = lower_word_re.findall(t)
     
     selected = []
     
@@ -298,7 +411,7 @@ def title_to_camel_case_words(title_field, min_words=3):
             break
         
         # Include word if it's not a stopword, or if it's the first word
-        if w.lower() not in COMMON_STOPWORDS or len(selected) == 0:
+        if w not in COMMON_STOPWORDS or len(selected) == 0:
             selected.append(w.capitalize())
     
     # If we don't have enough words, just take first min_words
@@ -335,7 +448,7 @@ def make_key_from_url(url, title):
     key = f"{domain}{title_part}"
     
     # Remove any remaining invalid characters (just in case)
-    key = re.sub(r'[^a-zA-Z0-9]', '', key)
+    key = non_alnum_re.sub('', key)
     
     return key
 
@@ -373,46 +486,141 @@ def write_file(path, data):
         f.write(data)
 
 
+def write_entries(path, entries):
+    """
+    Write BibTeX entries to file in UTF-8 encoding, separated by blank lines.
+    
+    Produces the same layout as '\n\n'.join(entries) + '\n' but streams the
+    entries instead of building the joined string.
+    
+    Args:
+        path: File path
+        entries: Iterable of entry text strings
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, e in enumerate(entries):
+            if i:
+                f.write('\n\n')
+            f.write(e)
+        f.write('\n')
+
+
+def find_tex_files(base_dir):
+    """
+    Find all .tex files under base_dir, skipping SKIP_DIRS.
+    
+    Uses an explicit os.scandir stack so directory/file checks come from the
+    directory listing itself instead of extra stat() calls.
+    
+    Args:
+        base_dir: Project root directory
+        
+    Returns:
+        List of .tex file paths
+    """
+    tex_files = []
+    stack = [base_dir]
+    
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            # Unreadable directory: skip it, as os.walk does by default
+            continue
+        with it:
+            for e in it:
+                try:
+                    is_dir = e.is_dir(follow_symlinks=False)
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if e.name not in SKIP_DIRS:
+                        stack.append(e.path)
+                elif e.name.endswith('.tex'):
+                    tex_files.append(e.path)
+    
+    return tex_files
+
+
 # ============================================================================
 # PARSING FUNCTIONS
 # ============================================================================
 
-def parse_entries(bibtext):
+def iter_entries(bibtext):
     """
-    Parse BibTeX file into individual entries.
+    Iterate over BibTeX entries in a single scan of the file.
     
-    Returns entries as tuples: (key, type, full_entry_text)
+    Yields entries as tuples: (key, type, full_entry_text)
     
     Args:
         bibtext: Full BibTeX file contents
         
-    Returns:
-        List of (key, type, entry_text) tuples
+    Yields:
+        (key, type, entry_text) tuples in file order
         
     Note:
         Each entry is extracted from one @type{key, to the next entry start.
         This preserves the exact formatting including whitespace and comments.
+        Entry starts are consumed lazily, so no list of matches is built.
     """
-    entries = []
-    
-    # Find all entry starts: @type{key,
-    matches = list(entry_re.finditer(bibtext))
+    it = entry_re.finditer(bibtext)
+    prev = next(it, None)
     
-    # For each entry, extract from current start to next start (or EOF)
-    for i, m in enumerate(matches):
-        start = m.start()
+    while prev is not None:
+        cur = next(it, None)
         # End at next entry start, or end of file
-        end = matches[i + 1].start() if i + 1 < len(matches) else len(bibtext)
+        end = cur.start() if cur is not None else len(bibtext)
         
         # Extract entry text and clean up trailing whitespace
-        entry_text = bibtext[start:end].rstrip('\n')
+        entry_text = bibtext[prev.start():end].rstrip('\n')
         
-        entry_type = m.group('type')
-        key = m.group('key').strip()
+        yield prev.group('key').strip(), prev.group('type'), entry_text
+        prev = cur
+
+
+# Per-entry metadata shared by duplicate detection and key generation
+EntryMeta = namedtuple('EntryMeta', 'author year title url base_key signature')
+
+
+def build_entry_meta(entry_text):
+    """
+    Extract fields from a BibTeX entry once and derive everything needed from them.
+    
+    Args:
+        entry_text: Full BibTeX entry text
         
-        entries.append((key, entry_type, entry_text))
+    Returns:
+        EntryMeta with the raw author (or editor), year, title and url
+        (or howpublished) fields, the standard base key, and the normalized
+        duplicate-detection signature
+    """
+    fields = extract_all_fields(entry_text)
+    author = fields.get('author') or fields.get('editor')
+    year = fields.get('year')
+    title = fields.get('title')
+    url = fields.get('url') or fields.get('howpublished')
+    
+    # Generate the standard key based on entry type
+    if not author and url:
+        # Web source without author: use domain + title format
+        base_key = make_key_from_url(url, title)
+    else:
+        # Standard format: authorYEARword
+        last = first_author_lastname(author)
+        word = short_title_word(title)
+        base_key = make_key(last, year, word)
+    
+    # Normalize all fields to lowercase ASCII for comparison
+    # (the signature uses the url field only, not howpublished)
+    author_norm, title_norm, doi_norm, isbn_norm, url_norm = (
+        normalize_field(v)
+        for v in (author, title, fields.get('doi'), fields.get('isbn'), fields.get('url'))
+    )
     
-    return entries
+    # Signature: primary by (author, year, title), secondary by identifiers
+    signature = (author_norm, year or '', title_norm, doi_norm, isbn_norm, url_norm)
+    
+    return EntryMeta(author, year, title, url, base_key, signature)
 
 
 # ============================================================================
@@ -432,35 +640,19 @@ def find_duplicates(bibtext):
     Returns:
         Tuple: (duplicates_dict, entries_list)
         - duplicates_dict: {signature: [key1, key2, ...], ...}
-        - entries_list: [(key, type, text), ...]
+        - entries_list: [(key, type, text, meta), ...] with meta an EntryMeta
     """
-    entries = parse_entries(bibtext)
+    entries = []
     
     # Map from normalized signature -> list of keys with that signature
     signature_map = defaultdict(list)
     
-    for key, etype, entry_text in entries:
-        # Extract metadata for comparison
-        author = extract_field(entry_text, 'author') or extract_field(entry_text, 'editor')
-        year = extract_field(entry_text, 'year')
-        title = extract_field(entry_text, 'title')
-        
-        # Additional fields for more reliable duplicate detection
-        doi = extract_field(entry_text, 'doi')
-        isbn = extract_field(entry_text, 'isbn')
-        url = extract_field(entry_text, 'url')
-        
-        # Normalize all fields to lowercase ASCII for comparison
-        author_norm = asciiify(author or '').lower() if author else ''
-        title_norm = asciiify(title or '').lower() if title else ''
-        year_norm = year or ''
-        doi_norm = asciiify(doi or '').lower() if doi else ''
-        isbn_norm = asciiify(isbn or '').lower() if isbn else ''
-        url_norm = asciiify(url or '').lower() if url else ''
-        
-        # Create signature: primary by (author, year, title), secondary by identifiers
-        signature = (author_norm, year_norm, title_norm, doi_norm, isbn_norm, url_norm)
-        signature_map[signature].append(key)
+    for key, etype, entry_text in iter_entries(bibtext):
+        # Extract metadata once; callers reuse it for key generation
+        meta = build_entry_meta(entry_text)
+        entries.append((key, etype, entry_text, meta))
+        
+        signature_map[meta.signature].append(key)
     
     # Extract only signatures with duplicates (2+ keys)
     duplicates = {sig: keys for sig, keys in signature_map.items() if len(keys) > 1}
@@ -514,34 +706,14 @@ def spot_duplicates():
     # --- REPORT WRONG KEY NAMES ---
     print()
     wrong_names = {}
-    pattern_ok_cache = {}
-    
-    for key, etype, entry_text in entries:
-        # Extract metadata for key generation
-        author = extract_field(entry_text, 'author') or extract_field(entry_text, 'editor')
-        year = extract_field(entry_text, 'year') or ''
-        title = extract_field(entry_text, 'title') or ''
-        url = extract_field(entry_text, 'url')
-        
-        # Generate what the key SHOULD be
-        if not author and url:
-            # Web source without author: use domain + title format
-            base = make_key_from_url(url, title)
-        else:
-            # Standard format: authorYEARword
-            last = first_author_lastname(author)
-            word = short_title_word(title)
-            base = make_key(last, year, word)
-        
-        # Cache compiled regex for performance
-        if base not in pattern_ok_cache:
-            # Acceptable: exact base, or base + numeric suffix
-            pattern_ok_cache[base] = re.compile(
-                r'^' + re.escape(base) + r'(?:\d+)?$'
-            )
-        
-        # Check if current key matches the expected pattern
-        if not pattern_ok_cache[base].match(key):
+    
+    for key, etype, entry_text, meta in entries:
+        # What the key SHOULD be (same base key that --fix generates)
+        base = meta.base_key
+        
+        # Acceptable: exact base, or base + numeric suffix
+        # (isdecimal accepts the same characters as the regex \d)
+        if not (key == base or (key.startswith(base) and key[len(base):].isdecimal())):
             wrong_names[key] = base
     
     if wrong_names:
@@ -558,6 +730,88 @@ def spot_duplicates():
 # FIXING FUNCTIONS
 # ============================================================================
 
+def file_contains_any(path, needles):
+    """
+    Check whether a file contains any of the given byte strings.
+    
+    The file is memory-mapped and searched in place, so files without a
+    match are never decoded or copied into a Python string.
+    
+    Args:
+        path: File path
+        needles: Iterable of byte strings
+        
+    Returns:
+        True if at least one needle occurs in the file
+    """
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped (and cannot contain anything)
+            return False
+        with mm:
+            return any(mm.find(n) != -1 for n in needles)
+
+
+def encode_keys(keys):
+    """
+    Encode citation keys for byte-level searching in .tex files.
+    
+    Each key is encoded as UTF-8 and, where it differs, as Latin-1 to match
+    the encodings read_file accepts.
+    
+    Args:
+        keys: Iterable of key strings
+        
+    Returns:
+        Set of encoded keys
+    """
+    encoded = set()
+    for k in keys:
+        encoded.add(k.encode('utf-8'))
+        try:
+            encoded.add(k.encode('latin-1'))
+        except UnicodeEncodeError:
+            pass
+    return encoded
+
+
+def process_tex_file(path, pattern, replace, old_key_bytes, dry_run):
+    """
+    Apply citation key replacements to a single .tex file.
+    
+    Args:
+        path: .tex file path
+        pattern: Compiled citation command pattern
+        replace: Substitution callback for pattern matches
+        old_key_bytes: Encoded keys that are renamed (see encode_keys);
+            files containing none are skipped
+        dry_run: If True, do not write the file back
+        
+    Returns:
+        Tuple: (modified, count) where count is the number of citation
+        commands substituted in a modified file
+    """
+    # Cheap substring pre-filter on the raw bytes: skip reading and the
+    # citation regex on files that cannot contain any renamed key
+    if not file_contains_any(path, old_key_bytes):
+        return False, 0
+    
+    txt = read_file(path)
+    
+    # Replace all citation keys in this file
+    new_txt, count = pattern.subn(replace, txt)
+    
+    if new_txt == txt:
+        return False, 0
+    
+    if not dry_run:
+        write_file(path, new_txt)
+    
+    return True, count
+
+
 def fix_all(dry_run=False):
     """
     Comprehensive fix: remove duplicates and rename all keys to standard format.
@@ -581,7 +835,9 @@ def fix_all(dry_run=False):
     # Create backup BEFORE any modifications
     if not dry_run:
         try:
-            write_file(BACKUP_PATH, bibtext)
+            # Copy at the file level (no re-encode of the text read above);
+            # a hardlink would not do, as the rewrite truncates BIB_PATH in place
+            shutil.copyfile(BIB_PATH, BACKUP_PATH)
             print(f"✓ Created backup at {BACKUP_PATH}\n")
         except IOError as e:
             print(f"ERROR: Failed to create backup: {e}", file=sys.stderr)
@@ -593,7 +849,6 @@ def fix_all(dry_run=False):
     
     # Build mapping from old keys (duplicates) to canonical keys (kept)
     dup_mapping = {}
-    indices_to_remove = set()
     
     if duplicates:
         print(f"Found {len(duplicates)} groups of duplicate entries")
@@ -607,26 +862,19 @@ def fix_all(dry_run=False):
             for dup_key in keys[1:]:
                 # Record that dup_key should be replaced with canonical key
                 dup_mapping[dup_key] = canonical
-                
-                # Find and mark for removal all entries with this duplicate key
-                for idx, (key, etype, entry_text) in enumerate(entries):
-                    if key == dup_key:
-                        indices_to_remove.add(idx)
         
-        print(f"Removing {len(indices_to_remove)} duplicate entries\n")
+        # Entries carrying a duplicate key are skipped in the rename loop below
+        removed_count = sum(1 for entry in entries if entry[0] in dup_mapping)
+        
+        print(f"Removing {removed_count} duplicate entries\n")
     else:
+        removed_count = 0
         print("No duplicates found\n")
     
-    # Filter out duplicate entries by index
-    unique_entries = [
-        (key, etype, entry_text)
-        for idx, (key, etype, entry_text) in enumerate(entries)
-        if idx not in indices_to_remove
-    ]
-    
     # ========== STEP 2: RENAME ENTRIES TO STANDARD FORMAT ==========
     
-    print(f"Renaming {len(unique_entries)} entries to standard format...\n")
+    renamed_count = len(entries) - removed_count
+    print(f"Renaming {renamed_count} entries to standard format...\n")
     
     # Mapping from old keys to new keys (for updating .tex files later)
     key_mapping = {}
@@ -636,23 +884,13 @@ def fix_all(dry_run=False):
     
     new_entries = []
     
-    for old_key, etype, entry_text in unique_entries:
-        # Extract metadata for key generation
-        author = extract_field(entry_text, 'author') or extract_field(entry_text, 'editor')
-        year = extract_field(entry_text, 'year')
-        title = extract_field(entry_text, 'title')
-        url = extract_field(entry_text, 'url') or extract_field(entry_text, 'howpublished')
-        
-        # Generate new key based on entry type
-        if not author and url:
-            # Web source without author: use domain + title format
-            base_key = make_key_from_url(url, title)
-        else:
-            # Standard format: authorYEARword
-            last = first_author_lastname(author)
-            word = short_title_word(title)
-            y = year if year else 'noyear'
-            base_key = make_key(last, y, word)
+    for old_key, etype, entry_text, meta in entries:
+        # Duplicates are dropped here; they are remapped after the loop
+        if old_key in dup_mapping:
+            continue
+        
+        # Base key was generated once while looking for duplicates
+        base_key = meta.base_key
         
         # Ensure uniqueness by appending numeric suffix if needed
         new_key = base_key
@@ -667,14 +905,10 @@ def fix_all(dry_run=False):
         
         # Replace the key in the BibTeX entry header
         # Pattern: @Type{oldkey, -> @Type{newkey,
-        old_pattern = r'@' + re.escape(etype) + r'\s*\{\s*' + re.escape(old_key) + r'\s*,'
-        new_entry = re.sub(
-            old_pattern,
-            f'@{etype}{{{new_key},',
-            entry_text,
-            count=1,
-            flags=re.IGNORECASE
-        )
+        # entry_text always starts with the header found by entry_re, so an
+        # anchored match gives its end without scanning the entry body
+        header = entry_re.match(entry_text)
+        new_entry = f'@{etype}{{{new_key},' + entry_text[header.end():]
         
         new_entries.append(new_entry)
     
@@ -688,45 +922,23 @@ def fix_all(dry_run=False):
     # ========== STEP 3: UPDATE .TEX FILES ==========
     
     # Find all .tex files in the project
-    tex_files = []
-    
-    for root, dirs, files in os.walk(BASE_DIR):
-        # Skip .git directories
-        if '.git' in dirs:
-            dirs.remove('.git')
-        
-        for fn in files:
-            if fn.endswith('.tex'):
-                tex_files.append(os.path.join(root, fn))
+    tex_files = find_tex_files(BASE_DIR)
     
     print(f"Updating {len(tex_files)} .tex files...\n")
     
-    # Pattern to match citation commands with their arguments
-    # Matches: \cite{key} or \cite[p. 5]{key} or \citep[see]{key} etc.
-    # FIXED: Now handles optional arguments correctly
-    cite_pattern = re.compile(
-        r'(\\(?:cite|citet|citep|citealt|citealp|citeauthor|citeyear|citeyearpar|'
-        r'Cite|Citet|Citep|Citealt|Citealp|Citeauthor|Citeyear|Citeyearpar|'
-        r'nocite|nocite\*)'
-        r'(?:\*)?'  # Optional * for starred variants
-        r'(?:\s*\[[^\]]*\])*'  # Optional arguments: [p. 5], [see][chap. 2], etc.
-        r')\s*\{([^}]+)\}'  # Required argument with keys
-    )
-    
-    def replace_keys_in_citation(match):
+    def replace_keys_in_citation(match, get=key_mapping.get):
         """
         Replace citation keys within a citation command.
         
         Handles comma-separated key lists: \cite{key1, key2, key3}
+        key_mapping.get is bound as a default argument, so the per-key
+        lookup is a local call rather than a closure + attribute lookup.
         """
         prefix = match.group(1)  # The \cite command and optional args
         keys_str = match.group(2)  # Comma-separated keys
         
-        # Split into individual keys and strip whitespace
-        keys = [k.strip() for k in keys_str.split(',')]
-        
-        # Replace each key if it's in the mapping
-        new_keys = [key_mapping.get(k, k) for k in keys]
+        # Strip each key once, then replace it if it's in the mapping
+        new_keys = [get(k, k) for k in map(str.strip, keys_str.split(','))]
         
         # Reconstruct: \cite{key1, key2}
         return f"{prefix}{{{', '.join(new_keys)}}}"
@@ -735,32 +947,37 @@ def fix_all(dry_run=False):
     modified_files = 0
     replaced_citations = 0
     
-    for tex_file in tex_files:
-        try:
-            txt = read_file(tex_file)
-            original_txt = txt
-            
-            # Replace all citation keys in this file
-            txt, count = cite_pattern.subn(replace_keys_in_citation, txt)
+    # Only keys that are actually renamed can change a .tex file
+    old_keys = {k for k, v in key_mapping.items() if k != v}
+    old_key_bytes = encode_keys(old_keys)
+    
+    # Reading and writing dominate here and release the GIL, so threads help
+    max_workers = min(16, (os.cpu_count() or 1) * 4)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futures = {
+            ex.submit(process_tex_file, tex_file, cite_pattern, replace_keys_in_citation,
+                      old_key_bytes, dry_run): tex_file
+            for tex_file in (tex_files if old_keys else ())
+        }
+        
+        for future in as_completed(futures):
+            try:
+                modified, count = future.result()
+            except IOError as e:
+                print(f"WARNING: Could not update {futures[future]}: {e}", file=sys.stderr)
+                continue
             
-            if txt != original_txt:
+            if modified:
                 modified_files += 1
                 replaced_citations += count
-                
-                if not dry_run:
-                    write_file(tex_file, txt)
-        
-        except IOError as e:
-            print(f"WARNING: Could not update {tex_file}: {e}", file=sys.stderr)
     
     # ========== WRITE NEW BIB FILE ==========
     
-    # Join entries with double newlines (standard BibTeX formatting)
-    new_bib = '\n\n'.join(new_entries) + '\n'
-    
+    # Entries separated by double newlines (standard BibTeX formatting)
     if not dry_run:
         try:
-            write_file(BIB_PATH, new_bib)
+            write_entries(BIB_PATH, new_entries)
         except IOError as e:
             print(f"ERROR: Failed to write {BIB_PATH}: {e}", file=sys.stderr)
             sys.exit(1)
@@ -775,8 +992,8 @@ def fix_all(dry_run=False):
         print('[DRY RUN - No files were modified]')
         print()
     
-    print(f"Removed {len(indices_to_remove)} duplicate entries")
-    print(f"Renamed {len(unique_entries)} entries to standard format")
+    print(f"Removed {removed_count} duplicate entries")
+    print(f"Renamed {renamed_count} entries to standard format")
     print(f"Updated {modified_files} .tex files")
     print(f"Updated {replaced_citations} citation references")
     
@@ -1,4 +1,4 @@
-import itertools, math
+import itertools
 from functools import lru_cache
 import networkx as nx
 
@@ -9,16 +9,17 @@ G = nx.wheel_graph(7)  # nodes 0..6
 
 nodes = list(G.nodes())
 
-# -----------------------------------------------
-# 2) Exact treewidth by brute-force elimination
-# -----------------------------------------------
+# ----------------------------------------------------------------------
+# 2) Treewidth: elimination width per ordering, min-degree upper bound
+# ----------------------------------------------------------------------
 def elimination_width_and_bags(G, order):
     adj = {v: set(G.neighbors(v)) for v in G.nodes()}
     bags = []
     width = 0
     for v in order:
         N = set(adj[v])
-        width = max(width, len(N))
+        if len(N) > width:
+            width = len(N)
         bag = set([v]) | N
         bags.append((v, bag, N))
         for a in N:
@@ -30,16 +31,156 @@ def elimination_width_and_bags(G, order):
         adj[v].clear()
     return width, bags
 
-best_tw = math.inf
-best_order_tw = None
-best_bags_tw = None
+def min_degree_order(G):
+    # greedy upper bound: always eliminate a vertex of minimum current degree
+    adj = {v: set(G.neighbors(v)) for v in G.nodes()}
+    order = []
+    while adj:
+        v = min(adj, key=lambda u: len(adj[u]))
+        N = adj.pop(v)
+        for a in N:
+            adj[a] |= N
+            adj[a].discard(a)
+            adj[a].discard(v)
+        order.append(v)
+    return order
+
+# ----------------------------------------------------------------------
+# 3) Pathwidth by incremental vertex separation; exact treewidth and
+#    pathwidth by heuristic-bounded branch-and-bound over ordering prefixes
+# ----------------------------------------------------------------------
+def vertex_separation(G, order):
+    # boundary = prefix vertices that still have a neighbour outside the prefix;
+    # outside[u] counts those neighbours, so each step only touches N(v)
+    outside = {u: G.degree(u) for u in G.nodes()}
+    prefix = set()
+    boundary_size = 0
+    max_sep = 0
+    for v in order:
+        prefix.add(v)
+        if outside[v] > 0:
+            boundary_size += 1
+        for u in G.neighbors(v):
+            outside[u] -= 1
+            if outside[u] == 0 and u in prefix:
+                boundary_size -= 1
+        if boundary_size > max_sep:
+            max_sep = boundary_size
+    return max_sep
+
+# -----------------------------------------------
+# 3b) One ordering search for both treewidth and pathwidth
+# -----------------------------------------------
+def best_orderings(G, tw_bound, pw_bound, automorphisms=()):
+    # Depth-first search over ordering prefixes in itertools.permutations order.
+    # Elimination width and vertex separation are both maxima over prefixes, so
+    # each is tracked incrementally and a prefix is cut once neither can still
+    # beat its best value so far (or its initial bound). Returns, per measure,
+    # the first ordering in permutation order of minimum value below the bound.
+    #
+    # Vertices are indices into G's node list, with neighbour lists built once,
+    # so the inner loop does no NetworkX lookups; results are mapped back to
+    # labels.
+    #
+    # Both widths are invariant under automorphisms, so the first optimal
+    # ordering is lexicographically no larger than any of its images. A prefix
+    # that some automorphism maps to a smaller prefix is therefore cut; only
+    # automorphisms fixing the prefix pointwise ("tied") can still do that.
+    nodes = list(G.nodes())
+    index = {v: i for i, v in enumerate(nodes)}
+    nbrs = [[index[u] for u in G.neighbors(v)] for v in nodes]
+    best_tw = [tw_bound, None, None]
+    best_pw = [pw_bound, None]
+    order = []
+    bags = []
+    outside = [len(nb) for nb in nbrs]
+    in_prefix = [False] * len(nodes)
+
+    index_maps = [[index[a[v]] for v in nodes] for a in automorphisms]
+    index_maps = [m for m in index_maps if m != list(range(len(nodes)))]
+
+    def extend(remaining, adj, width, boundary_size, sep, tied):
+        # adj is None once this prefix can no longer improve the treewidth
+        if not remaining:
+            if adj is not None and width < best_tw[0]:
+                best_tw[:] = [width, tuple(order), list(bags)]
+            if sep < best_pw[0]:
+                best_pw[:] = [sep, tuple(order)]
+            return
+        for i, v in enumerate(remaining):
+            still_tied = []
+            smaller_image = False
+            for m in tied:
+                if m[v] < v:
+                    smaller_image = True  # an automorphic image of this prefix comes first
+                    break
+                if m[v] == v:
+                    still_tied.append(m)
+            if smaller_image:
+                continue
+
+            tw_alive = False
+            if adj is not None:
+                N = adj[v]
+                w = len(N)
+                if w < width:
+                    w = width
+                tw_alive = w < best_tw[0]
+
+            # add v to the prefix and update the separation boundary
+            in_prefix[v] = True
+            size = boundary_size + (outside[v] > 0)
+            for u in nbrs[v]:
+                outside[u] -= 1
+                if outside[u] == 0 and in_prefix[u]:
+                    size -= 1
+            sep_here = size if size > sep else sep
 
-for order in itertools.permutations(nodes):
-    w, bags = elimination_width_and_bags(G, order)
-    if w < best_tw:
-        best_tw = w
-        best_order_tw = order
-        best_bags_tw = bags
+            if tw_alive or sep_here < best_pw[0]:
+                order.append(v)
+                if tw_alive:
+                    # eliminate v: its neighbourhood becomes a clique; entries
+                    # of eliminated vertices are stale but never read again
+                    rest = list(adj)
+                    for u in N:
+                        rest[u] = (adj[u] | N) - {u, v}
+                    bags.append((v, N))
+                    extend(remaining[:i] + remaining[i + 1:], rest, w, size, sep_here, still_tied)
+                else:
+                    bags.append(None)
+                    extend(remaining[:i] + remaining[i + 1:], None, width, size, sep_here, still_tied)
+                order.pop()
+                bags.pop()
+
+            for u in nbrs[v]:
+                outside[u] += 1
+            in_prefix[v] = False
+
+    extend(tuple(range(len(nodes))), [set(nb) for nb in nbrs], 0, 0, 0, index_maps)
+
+    tw, tw_order, tw_bags = best_tw
+    if tw_order is not None:
+        tw_order = tuple(nodes[v] for v in tw_order)
+        tw_bags = [(nodes[v], {nodes[v]} | {nodes[u] for u in N}, {nodes[u] for u in N})
+                   for v, N in tw_bags]
+    pw, pw_order = best_pw
+    if pw_order is not None:
+        pw_order = tuple(nodes[v] for v in pw_order)
+    return (tw, tw_order, tw_bags), (pw, pw_order)
+
+# Any subset of the automorphism group prunes soundly, so highly symmetric
+# graphs (e.g. complete graphs, with n! automorphisms) are capped
+MAX_AUTOMORPHISMS = 64
+automorphisms = list(itertools.islice(
+    nx.algorithms.isomorphism.GraphMatcher(G, G).isomorphisms_iter(), MAX_AUTOMORPHISMS))
+
+# Heuristic values + 1 bound the search; +1 keeps orderings that merely tie
+# the heuristic, so the reported orderings are the same ones an exhaustive scan
+# over itertools.permutations(nodes) would keep.
+heuristic_order = min_degree_order(G)
+(best_tw, best_order_tw, best_bags_tw), (best_pw, best_order_pw) = best_orderings(
+    G, elimination_width_and_bags(G, heuristic_order)[0] + 1,
+    vertex_separation(G, heuristic_order) + 1, automorphisms)
 
 pos = {v: i for i, v in enumerate(best_order_tw)}
 bag_ids = {v: i for i, v in enumerate(best_order_tw)}
@@ -53,26 +194,6 @@ for v, bag, N in best_bags_tw:
         parent = min(later_neighbors, key=lambda u: pos[u])
         edges_td.append((bag_ids[v], bag_ids[parent]))
 
-# -----------------------------------------------
-# 3) Exact pathwidth by brute-force vertex separation
-# -----------------------------------------------
-def vertex_separation(G, order):
-    prefix = set()
-    max_sep = 0
-    for v in order:
-        prefix.add(v)
-        boundary = {u for u in prefix if any((w not in prefix) for w in G.neighbors(u))}
-        max_sep = max(max_sep, len(boundary))
-    return max_sep
-
-best_pw = math.inf
-best_order_pw = None
-for order in itertools.permutations(nodes):
-    sep = vertex_separation(G, order)
-    if sep < best_pw:
-        best_pw = sep
-        best_order_pw = order
-
 order_pw = list(best_order_pw)
 B_path = []
 prefix = set()
@@ -91,16 +212,44 @@ def height(tree):
         return 1
     return 1 + max(height(t) for t in ch)
 
+# Vertex subsets are bitmasks over td_nodes (sorted, so bit order follows the
+# vertex order the search visits); nbr[i] is the neighbour mask of td_nodes[i].
+# Components are listed by their lowest vertex in sorted order. The old
+# G.subgraph version listed them in set/subgraph iteration order instead, so
+# sibling order in the TikZ forest can differ from its output.
+td_nodes = sorted(G.nodes())
+td_index = {v: i for i, v in enumerate(td_nodes)}
+nbr = [sum(1 << td_index[u] for u in G.neighbors(v)) for v in td_nodes]
+
+def bits(mask):
+    # indices of the set bits, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def components(mask):
+    # connected components of the subgraph induced by mask, ordered by lowest vertex
+    while mask:
+        comp = 0
+        frontier = mask & -mask
+        while frontier:
+            comp |= frontier
+            reach = 0
+            for i in bits(frontier):
+                reach |= nbr[i]
+            frontier = reach & mask & ~comp
+        yield comp
+        mask &= ~comp
+
 @lru_cache(None)
-def td_and_forest(S_fro):
-    S = set(S_fro)
+def td_and_forest(S):
     if not S:
         return 0, []  # empty forest
 
-    H = G.subgraph(S)
-    comps = [tuple(sorted(c)) for c in nx.connected_components(H)]
+    comps = list(components(S))
     if len(comps) > 1:
-        sub = [td_and_forest(tuple(c)) for c in comps]
+        sub = [td_and_forest(c) for c in comps]
         td_val = max(t for t, _ in sub)
         forest = []
         for _, f in sub:
@@ -111,22 +260,21 @@ def td_and_forest(S_fro):
     best_root = None
     best_children = None
 
-    for v in S:
-        S2 = tuple(sorted(S - {v}))
-        H2 = G.subgraph(S2)
-        comps2 = [tuple(sorted(c)) for c in nx.connected_components(H2)]
+    for v in bits(S):
+        S2 = S & ~(1 << v)
 
         children = []
         max_child_td = 0
-        for c in comps2:
-            tdc, fc = td_and_forest(tuple(c))
-            max_child_td = max(max_child_td, tdc)
+        for c in components(S2):
+            tdc, fc = td_and_forest(c)
+            if tdc > max_child_td:
+                max_child_td = tdc
             children.extend(fc)
 
         td_here = 1 + max_child_td
         if best_td is None or td_here < best_td:
             best_td = td_here
-            best_root = v
+            best_root = td_nodes[v]
             best_children = children
 
     return best_td, [(best_root, best_children)]
@@ -175,11 +323,21 @@ def tikz_path_decomposition(bags):
     return "\n".join(lines)
 
 def tikz_rooted_tree(tree):
-    r, children = tree
-    s = f"node{{{r}}}"
-    for ch in children:
-        s += " child {" + tikz_rooted_tree(ch) + "}"
-    return s
+    # explicit stack of subtrees and literal pieces, joined once at the end
+    parts = []
+    stack = [tree]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+            continue
+        r, children = item
+        parts.append(f"node{{{r}}}")
+        for ch in reversed(children):
+            stack.append("}")
+            stack.append(ch)
+            stack.append(" child {")
+    return "".join(parts)
 
 def tikz_treedepth_forest(forest):
     lines = []
@@ -200,7 +358,7 @@ def tikz_treedepth_forest(forest):
 print("Exact treewidth =", best_tw)
 print("Exact pathwidth  =", best_pw)
 
-td_val, forest = td_and_forest(tuple(sorted(G.nodes())))
+td_val, forest = td_and_forest((1 << len(td_nodes)) - 1)
 print("Exact treedepth  =", td_val)
 print("Treedepth decomposition height check =", max(height(t) for t in forest) if forest else 0)
 